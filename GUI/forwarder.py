@@ -0,0 +1,177 @@
+"""
+This file contains the forwarder that relays a base station plugged into this
+machine to a central GUI over the network. Frames are read with the same
+StationReader used by the GUI, batched, and sent over TCP (reconnecting with
+backoff if the GUI goes away) or UDP. While the link is down frames wait in a
+bounded IngestQueue, dropping the oldest once it is full.
+
+The station is named <hostname>:<serial port> unless --name is given. The name
+is sent when each TCP connection opens and in front of every UDP datagram.
+
+Example:
+    python forwarder.py COM3 --tcp 192.168.1.10:5000 --name north-ridge
+"""
+
+import argparse
+import socket
+import sys
+import threading
+import time
+from ingest_queue import IngestQueue, DROP_POLICIES, DROP_OLDEST
+from station_reader import StationReader
+from transports import BAUD_RATE, PACKET_SIZE, SerialTransport, parse_address, station_header
+
+BATCH_SIZE = 32         # Max frames sent per write/datagram
+LINGER = 0.05           # Seconds to wait for more frames before sending a partial batch
+QUEUE_SIZE = 1024       # Frames buffered while the network link is down
+MIN_RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 30.0
+
+class TCPSink:
+    """ Sends batches to the GUI over a TCP connection, reconnecting when it drops """
+
+    def __init__(self, host, port, name):
+        self.address = (host, port)
+        self.header = station_header(name)
+        self.sock = None
+
+    def send(self, data):
+        try:
+            if self.sock is None:
+                self.sock = socket.create_connection(self.address, timeout=5)
+                print(f"Connected to {self.address[0]}:{self.address[1]}")
+                self.sock.sendall(self.header)   # Identify the station before any frames
+            self.sock.sendall(data)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+class UDPSink:
+    """ Sends each batch to the GUI as a single datagram """
+
+    def __init__(self, host, port, name):
+        self.address = (host, port)
+        self.header = station_header(name)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, data):
+        self.sock.sendto(self.header + data, self.address)
+
+    def close(self):
+        self.sock.close()
+
+class Forwarder:
+    """ Relays frames from a local base station to a network sink """
+
+    def __init__(self, station, sink, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE,
+                 linger=LINGER, drop_policy=DROP_OLDEST):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.linger = linger
+        self.ingest_queue = IngestQueue(queue_size, drop_policy)
+        self.station_reader = StationReader([station], self.ingest_queue, PACKET_SIZE)
+        self.reported_drops = 0
+        self.short_frames = 0   # Partial frames flushed by the framer, never forwarded
+        self.reported_short_frames = 0
+
+    def next_batch(self):
+        """ Wait for a frame, then give more frames up to linger seconds to fill the batch """
+        batch = self.ingest_queue.get_batch(self.batch_size, timeout=1)
+        deadline = time.monotonic() + self.linger
+        while batch and len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            more = self.ingest_queue.get_batch(self.batch_size - len(batch), timeout=remaining)
+            if not more:
+                break
+            batch += more
+        return batch
+
+    def report_drops(self):
+        """ Print a warning whenever frames have been dropped since the last report """
+        stats = self.ingest_queue.stats()
+        if stats["dropped"] > self.reported_drops:
+            print(f"Warning: dropped {stats['dropped'] - self.reported_drops} frame(s) "
+                  f"while the network was unavailable", file=sys.stderr)
+            self.reported_drops = stats["dropped"]
+        if self.short_frames > self.reported_short_frames:
+            print(f"Warning: dropped {self.short_frames - self.reported_short_frames} partial frame(s) "
+                  f"from the base station (total {self.short_frames})", file=sys.stderr)
+            self.reported_short_frames = self.short_frames
+
+    def run(self):
+        """ Forward frames until the base station disconnects """
+        threading.Thread(target=self.station_reader.run, daemon=True).start()
+
+        pending = b""
+        retry_delay = MIN_RETRY_DELAY
+        try:
+            while True:
+                if not pending:
+                    batch = self.next_batch()
+                    if not batch:
+                        if self.ingest_queue.closed:
+                            break
+                        continue
+                    # Partial frames would shift every later frame in the GUI's stream, so drop them here
+                    frames = [frame for _, frame in batch if len(frame) == PACKET_SIZE]
+                    self.short_frames += len(batch) - len(frames)
+                    pending = b"".join(frames)
+                    if not pending:
+                        self.report_drops()
+                        continue
+
+                try:
+                    self.sink.send(pending)
+                    pending = b""
+                    retry_delay = MIN_RETRY_DELAY
+                except OSError as err:
+                    # Keep the unsent batch and retry, frames keep queueing in the meantime
+                    print(f"Network error: {err}. Retrying in {retry_delay:.0f}s", file=sys.stderr)
+                    time.sleep(retry_delay)
+                    retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
+
+                self.report_drops()
+        finally:
+            self.station_reader.stop()
+            self.sink.close()
+
+        print("Base station disconnected", file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relay a local base station to a remote base station GUI")
+    parser.add_argument("port", help="Serial port the base station is plugged into")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--tcp", metavar="HOST:PORT", help="Send frames to the GUI over TCP")
+    target.add_argument("--udp", metavar="HOST:PORT", help="Send frames to the GUI over UDP")
+    parser.add_argument("--name", help="Station name shown in the GUI (default: <hostname>:<port>)")
+    parser.add_argument("--baud", type=int, default=BAUD_RATE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--linger", type=float, default=LINGER)
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    parser.add_argument("--drop-policy", choices=DROP_POLICIES, default=DROP_OLDEST)
+    args = parser.parse_args()
+
+    name = args.name or f"{socket.gethostname()}:{args.port}"
+    if args.tcp:
+        sink = TCPSink(*parse_address(args.tcp, default_host="localhost"), name)
+    else:
+        sink = UDPSink(*parse_address(args.udp, default_host="localhost"), name)
+
+    try:
+        station = SerialTransport(args.port, args.baud)
+    except OSError as err:
+        print(f"Error opening serial port: {err}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        Forwarder(station, sink, args.queue_size, args.batch_size,
+                  args.linger, args.drop_policy).run()
+    except KeyboardInterrupt:
+        pass
@@ -7,17 +7,16 @@ interactive map running in Qt.
 from map_manager import MapManager
 from datetime import UTC
 import sys
-import serial
 
-from PyQt5 import QtCore, QtWebEngineWidgets, QtWidgets
+from PyQt5 import QtCore, QtGui, QtWebEngineWidgets, QtWidgets
 from PyQt5.QtSerialPort import QSerialPortInfo
 
 class SerialPortSelector(QtWidgets.QDialog):
-    """ Dialog for selecting serial port before launching main application """
+    """ Dialog for selecting the base station serial ports before launching main application """
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.port = None
+        self.ports = []
                 
         # Create button box
         self.buttonBox = QtWidgets.QDialogButtonBox(
@@ -26,15 +25,27 @@ class SerialPortSelector(QtWidgets.QDialog):
         self.initUI()
         
     def initUI(self):
-        self.setWindowTitle(" Serial Port ")
+        self.setWindowTitle(" Serial Ports ")
         layout = QtWidgets.QVBoxLayout()
         
         # Create label
-        label = QtWidgets.QLabel("Select the serial port for the map to read from:")
+        label = QtWidgets.QLabel("Select the base station serial port(s) for the map to read from:")
         layout.addWidget(label)
         
-        # Create drop down menu for available serial ports
-        self.portComboBox = QtWidgets.QComboBox()
+        # Create network port inputs for remote base stations running forwarder.py
+        self.tcpPortEdit = QtWidgets.QLineEdit()
+        self.tcpPortEdit.setPlaceholderText("Disabled")
+        self.tcpPortEdit.setValidator(QtGui.QIntValidator(1, 65535))
+        self.tcpPortEdit.textChanged.connect(self.updateOkButton)
+        self.udpPortEdit = QtWidgets.QLineEdit()
+        self.udpPortEdit.setPlaceholderText("Disabled")
+        self.udpPortEdit.setValidator(QtGui.QIntValidator(1, 65535))
+        self.udpPortEdit.textChanged.connect(self.updateOkButton)
+
+        # Create list of available serial ports, several base stations can be selected at once
+        self.portList = QtWidgets.QListWidget()
+        self.portList.setSelectionMode(QtWidgets.QAbstractItemView.MultiSelection)
+        self.portList.itemSelectionChanged.connect(self.updateOkButton)
         self.refreshPorts()
         
         # Create refresh button
@@ -43,10 +54,16 @@ class SerialPortSelector(QtWidgets.QDialog):
         
         # Layout for serial selection
         portLayout = QtWidgets.QHBoxLayout()
-        portLayout.addWidget(self.portComboBox)
+        portLayout.addWidget(self.portList)
         portLayout.addWidget(refreshButton)
         layout.addLayout(portLayout)
 
+        # Layout for remote base stations
+        networkLayout = QtWidgets.QFormLayout()
+        networkLayout.addRow("Listen for remote stations on TCP port:", self.tcpPortEdit)
+        networkLayout.addRow("Listen for remote stations on UDP port:", self.udpPortEdit)
+        layout.addLayout(networkLayout)
+
         self.buttonBox.accepted.connect(self.accept)
         self.buttonBox.rejected.connect(self.reject)
         layout.addWidget(self.buttonBox)
@@ -56,51 +73,70 @@ class SerialPortSelector(QtWidgets.QDialog):
     def refreshPorts(self):
         """ Refresh the list of available serial ports """
 
-        self.portComboBox.clear()
+        self.portList.clear()
         
         available_ports = QSerialPortInfo.availablePorts()
         
-        # Add ports to combobox
+        # Add ports to list
         for port in available_ports:
-            port_info = f"{port.portName()} - {port.description()}"
-            self.portComboBox.addItem(port_info, port.portName())
+            item = QtWidgets.QListWidgetItem(f"{port.portName()} - {port.description()}")
+            item.setData(QtCore.Qt.UserRole, port.portName())
+            self.portList.addItem(item)
             
-        # If no ports are available, disable OK button
-        if self.portComboBox.count() == 0:
-            self.portComboBox.addItem("No serial ports available")
-            self.buttonBox.button(QtWidgets.QDialogButtonBox.Ok).setEnabled(False)
+        # If no ports are available, show placeholder that can't be selected
+        if self.portList.count() == 0:
+            item = QtWidgets.QListWidgetItem("No serial ports available")
+            item.setFlags(QtCore.Qt.NoItemFlags)
+            self.portList.addItem(item)
+        # Select the first port by default to keep the single station workflow one click
         else:
-            self.buttonBox.button(QtWidgets.QDialogButtonBox.Ok).setEnabled(True)
+            self.portList.item(0).setSelected(True)
+
+        self.updateOkButton()
+
+    def updateOkButton(self):
+        """ Only enable OK button when at least one source is selected """
+        self.buttonBox.button(QtWidgets.QDialogButtonBox.Ok).setEnabled(bool(self.selectedPorts()))
+
+    def selectedPorts(self):
+        """ Serial ports currently selected in the list plus any enabled network listeners """
+        ports = [item.data(QtCore.Qt.UserRole) for item in self.portList.selectedItems()
+                 if item.data(QtCore.Qt.UserRole) is not None]
+        if self.tcpPortEdit.hasAcceptableInput():
+            ports.append(f"tcp://:{self.tcpPortEdit.text()}")
+        if self.udpPortEdit.hasAcceptableInput():
+            ports.append(f"udp://:{self.udpPortEdit.text()}")
+        return ports
         
     def accept(self):
-        """ Get the selected port when OK is clicked """
+        """ Get the selected ports when OK is clicked """
 
-        if self.portComboBox.count() > 0 and self.portComboBox.currentData() is not None:
-            self.port = self.portComboBox.currentData()
+        if self.selectedPorts():
+            self.ports = self.selectedPorts()
             super().accept()
             
-    def getSelectedPort(self):
-        """ Return the selected port """
-        return self.port
+    def getSelectedPorts(self):
+        """ Return the selected ports """
+        return self.ports
 
 class BaseStationGUI(QtWidgets.QWidget):
-    """Main QT GUI class that connects to base station via serial port"""
+    """Main QT GUI class that connects to one or more base stations via serial ports"""
 
-    def __init__(self, serial_port):
+    def __init__(self, serial_ports):
         super().__init__()
-        self.serial_port = serial_port
+        self.serial_ports = serial_ports
         self.initUI()
 
     def initUI(self):
         self.webEngineView = QtWebEngineWidgets.QWebEngineView()
 
         try:
-            self.mapManager = MapManager(self.serial_port)
-        except serial.SerialException:
+            self.mapManager = MapManager(self.serial_ports)
+        except OSError:
             QtWidgets.QMessageBox.critical(
                 self, 
                 "Connection Error",
-                f"Could not connect to Arduino on {self.serial_port}. Please check the connection."
+                f"Could not connect to Arduino on {', '.join(self.serial_ports)}. Please check the connection."
             )
             sys.exit(1)
 
@@ -196,7 +232,7 @@ class BaseStationGUI(QtWidgets.QWidget):
         layout.setStretchFactor(self.webEngineView, 15)
 
         self.resize(1280, 1024)
-        self.setWindowTitle(f"Base station GUI - {self.serial_port}")
+        self.setWindowTitle(f"Base station GUI - {', '.join(self.serial_ports)}")
         self.show()
 
     def pauseMap(self):
@@ -249,10 +285,7 @@ class BaseStationGUI(QtWidgets.QWidget):
         box.setStandardButtons(QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
 
         if box.exec() == QtWidgets.QMessageBox.Yes:
-            self.mapManager.live_data["features"] = []
-            self.mapManager.history_data["features"] = []
-            self.mapManager.save_json(self.mapManager.live_file, self.mapManager.live_data)
-            self.mapManager.save_json(self.mapManager.history_file, self.mapManager.history_data)
+            self.mapManager.clear_beacons()
             self.forceMapUpdate()
 
     def updateIDFilter(self):
@@ -309,8 +342,8 @@ if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
 
     port = SerialPortSelector()
-    if port.exec() == QtWidgets.QDialog.Accepted and port.port:
-        gui = BaseStationGUI(port.port)
+    if port.exec() == QtWidgets.QDialog.Accepted and port.ports:
+        gui = BaseStationGUI(port.getSelectedPorts())
         sys.exit(app.exec())
     else:
         sys.exit(0)
\ No newline at end of file
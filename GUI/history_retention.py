@@ -0,0 +1,182 @@
+"""
+This file contains the retention policy for beacon history. Recent fixes are
+kept at full resolution in history_beacons.json, while older fixes are
+downsampled per radio and moved into time-partitioned segment files that are
+only loaded when a date/time filter reaches back into them.
+"""
+
+from datetime import UTC, datetime, timedelta
+import json
+import os
+import threading
+
+TIME_FORMAT = "%m-%d-%Y %H:%M:%S"
+SEGMENT_NAME_FORMAT = "%Y%m%d-%H%M"
+
+FULL_RESOLUTION = timedelta(hours=24)       # Fixes newer than this are kept untouched
+DOWNSAMPLE_INTERVAL = timedelta(minutes=5)  # Older fixes keep one fix per radio per interval
+SEGMENT_PERIOD = timedelta(hours=24)        # Time span covered by each segment file
+SEGMENT_DIR = "history_segments"
+
+def feature_time(feature):
+    """ Parse the UTC time of a feature """
+    return datetime.strptime(feature["properties"]["Time"], TIME_FORMAT).replace(tzinfo=UTC)
+
+def feature_key(feature):
+    """ Key that identifies one transmission of a beacon """
+    properties = feature["properties"]
+    return (properties.get("Radio ID"), properties.get("Message ID"), properties.get("Time"))
+
+class HistoryRetention:
+    """ Compacts old history into downsampled segment files and loads them back on demand """
+
+    def __init__(self, segment_dir=SEGMENT_DIR, full_resolution=FULL_RESOLUTION,
+                 downsample_interval=DOWNSAMPLE_INTERVAL, segment_period=SEGMENT_PERIOD):
+        self.segment_dir = segment_dir
+        self.full_resolution = full_resolution
+        self.downsample_interval = downsample_interval
+        self.segment_period = segment_period
+        self.loaded_segments = {}   # Segment path -> features, for segments the current filter reaches
+        self.lock = threading.Lock()    # Compaction runs on the processing thread, loading on the GUI thread
+
+    def compact(self, features, now=None):
+        """ Move fixes older than the full resolution window into segments.
+            Returns the features that stay in the live history file """
+
+        now = datetime.now(UTC) if now is None else now
+        cutoff = now - self.full_resolution
+
+        recent, old = [], []
+        for feature in features:
+            (old if feature_time(feature) < cutoff else recent).append(feature)
+
+        if old:
+            kept = self.write_segments(old)
+            print(f"Compacting history: {len(old)} old fixes moved to segments, {kept} fixes kept")
+        return recent
+
+    def is_expired(self, utc_time, now=None):
+        """ Check if a fix time is older than the full resolution window """
+        now = datetime.now(UTC) if now is None else now
+        return datetime.strptime(utc_time, TIME_FORMAT).replace(tzinfo=UTC) < now - self.full_resolution
+
+    def downsample(self, features):
+        """ Keep one fix per radio per downsample interval, plus every panic transition """
+
+        by_radio = {}
+        for feature in features:
+            by_radio.setdefault(feature["properties"]["Radio ID"], []).append(feature)
+
+        interval = self.downsample_interval.total_seconds()
+        kept = []
+        for radio_features in by_radio.values():
+            radio_features.sort(key=feature_time)
+            last_bucket = None
+            last_panic = None
+            for feature in radio_features:
+                bucket = int(feature_time(feature).timestamp() // interval)
+                panic = feature["properties"]["Panic State"]
+                # Always keep the fix where panic mode turned on or off
+                if bucket != last_bucket or panic != last_panic:
+                    kept.append(feature)
+                    last_bucket = bucket
+                last_panic = panic
+        return kept
+
+    def segment_start(self, time):
+        """ Start time of the segment a fix belongs to """
+        period = self.segment_period.total_seconds()
+        return datetime.fromtimestamp(time.timestamp() // period * period, UTC)
+
+    def segment_path(self, start):
+        return os.path.join(self.segment_dir, f"history_{start.strftime(SEGMENT_NAME_FORMAT)}.json")
+
+    def write_segments(self, features):
+        """ Merge features into their segment files and downsample each segment.
+            Returns the number of new fixes kept """
+
+        by_segment = {}
+        for feature in features:
+            by_segment.setdefault(self.segment_path(self.segment_start(feature_time(feature))), []).append(feature)
+
+        os.makedirs(self.segment_dir, exist_ok=True)
+        kept = 0
+        for path, segment_features in by_segment.items():
+            segment = self.read_segment(path)
+
+            # Skip fixes already in the segment, so compacting the same history twice
+            # (e.g. after a crash before history_beacons.json was saved) is harmless
+            merged = {feature_key(feature): feature for feature in segment["features"]}
+            new_keys = set()
+            for feature in segment_features:
+                if feature_key(feature) not in merged:
+                    merged[feature_key(feature)] = feature
+                    new_keys.add(feature_key(feature))
+
+            # Downsample the whole segment so a bucket split across two compactions still keeps one fix
+            segment["features"] = sorted(self.downsample(list(merged.values())), key=feature_time)
+            kept += sum(1 for feature in segment["features"] if feature_key(feature) in new_keys)
+
+            # Hold the lock so a load can't cache the segment from before this write
+            with self.lock:
+                with open(path, 'w') as f:
+                    json.dump(segment, f, indent=4)
+                self.loaded_segments.pop(path, None)
+        return kept
+
+    def read_segment(self, path):
+        """ Read one segment file """
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                print(f"Error reading {path}. Ignoring segment.")
+        return {
+            "type": "FeatureCollection",
+            "features": []
+        }
+
+    def segments(self):
+        """ List (start time, path) of every segment on disk """
+        if not os.path.isdir(self.segment_dir):
+            return []
+
+        segments = []
+        for name in os.listdir(self.segment_dir):
+            if not (name.startswith("history_") and name.endswith(".json")):
+                continue
+            try:
+                start = datetime.strptime(name[len("history_"):-len(".json")], SEGMENT_NAME_FORMAT)
+            except ValueError:
+                continue
+            segments.append((start.replace(tzinfo=UTC), os.path.join(self.segment_dir, name)))
+        return sorted(segments)
+
+    def load_range(self, start=None, end=None):
+        """ Features from every segment overlapping the time range (None means unbounded) """
+
+        features = []
+        loaded = {}
+        with self.lock:
+            for segment_start, path in self.segments():
+                segment_end = segment_start + self.segment_period
+                if start is not None and segment_end <= start:
+                    continue
+                if end is not None and segment_start > end:
+                    continue
+                if path not in self.loaded_segments:
+                    self.loaded_segments[path] = self.read_segment(path)["features"]
+                loaded[path] = self.loaded_segments[path]
+                features.extend(loaded[path])
+
+            # Only keep the segments the current filter needs in memory
+            self.loaded_segments = loaded
+        return features
+
+    def clear(self):
+        """ Delete every segment file """
+        with self.lock:
+            for _, path in self.segments():
+                os.remove(path)
+            self.loaded_segments = {}
@@ -0,0 +1,107 @@
+"""
+This file contains the bounded queue that sits between the serial reader and
+the packet processing stage. The reader only frames bytes and hands them off
+here so a slow map render can never stall reads from the base station.
+"""
+
+from collections import deque
+import threading
+
+DROP_OLDEST = "drop_oldest"     # Discard the oldest queued frame to make room
+DROP_NEWEST = "drop_newest"     # Discard the incoming frame
+BLOCK = "block"                 # Wait for room (reader stalls, OS buffer absorbs the burst)
+
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+class IngestQueue:
+    """ Thread-safe bounded FIFO of raw frames with an overflow policy and counters """
+
+    def __init__(self, maxsize=256, policy=DROP_OLDEST):
+        if maxsize <= 0:
+            raise ValueError(f"Queue size must be positive. Received {maxsize}")
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy '{policy}'. Expected one of {DROP_POLICIES}")
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.frames = deque()
+        self.closed = False
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+
+        # Backpressure metrics
+        self.enqueued = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def put(self, frame, timeout=None):
+        """ Add a frame to the queue, applying the overflow policy when full.
+            Returns False if the frame (or an older one) was dropped """
+
+        with self.lock:
+            if self.closed:
+                return False
+
+            accepted = True
+            if len(self.frames) >= self.maxsize:
+                if self.policy == DROP_OLDEST:
+                    self.frames.popleft()
+                    self.dropped += 1
+                    accepted = False
+                elif self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                else:
+                    # Block until the processing stage makes room
+                    if not self.not_full.wait_for(
+                            lambda: self.closed or len(self.frames) < self.maxsize, timeout):
+                        self.dropped += 1
+                        return False
+                    if self.closed:
+                        return False
+
+            self.frames.append(frame)
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self.frames))
+            self.not_empty.notify()
+            return accepted
+
+    def get_batch(self, max_frames, timeout=None):
+        """ Wait for at least one frame and return up to max_frames of them in order.
+            Returns an empty list on timeout or once the queue is closed and drained """
+
+        with self.lock:
+            self.not_empty.wait_for(lambda: self.closed or self.frames, timeout)
+
+            batch = []
+            while self.frames and len(batch) < max_frames:
+                batch.append(self.frames.popleft())
+
+            if batch:
+                self.not_full.notify_all()
+            return batch
+
+    def close(self):
+        """ Stop accepting frames and wake any waiting threads """
+        with self.lock:
+            self.closed = True
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+
+    def depth(self):
+        """ Number of frames currently waiting to be processed """
+        with self.lock:
+            return len(self.frames)
+
+    def stats(self):
+        """ Snapshot of the queue metrics """
+        with self.lock:
+            return {
+                "depth": len(self.frames),
+                "max_depth": self.max_depth,
+                "capacity": self.maxsize,
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "policy": self.policy
+            }
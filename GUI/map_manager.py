@@ -6,13 +6,19 @@ import io
 import struct
 import sys
 import threading
-import serial
 import os
 import json
 import folium 
+from ingest_queue import IngestQueue, DROP_OLDEST
+from history_retention import HistoryRetention, feature_key
+from marker_cache import MARKER_CSS, MarkerCache
+from station_reader import StationReader
+from transports import BAUD_RATE, PACKET_SIZE, open_transport
 
-BAUD_RATE = 9600
-PACKET_SIZE = 16
+QUEUE_SIZE = 256            # Max frames buffered between the reader and processing
+BATCH_SIZE = 32             # Max frames processed per map render
+DROP_POLICY = DROP_OLDEST   # What to do with frames when the queue is full
+COMPACT_INTERVAL = 600      # Seconds between moving old history into segment files
 
 MAX_RADIO_ID = 16
 lngMin, lngMax = -180., 180.
@@ -28,12 +34,21 @@ class MapManager(QtCore.QObject):
     htmlChanged = QtCore.pyqtSignal(str)
     closeWindow = QtCore.pyqtSignal()
 
-    def __init__(self, SERIAL_PORT):
+    def __init__(self, SOURCES, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE, drop_policy=DROP_POLICY):
         super().__init__()
+        if isinstance(SOURCES, str):
+            SOURCES = [SOURCES]
+
+        # Open every base station up front so a bad port fails before the GUI starts.
+        # Sources are serial port names, or "tcp://host:port" / "udp://host:port" for remote forwarders
+        self.stations = []
         try:
-            self.serial_port = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
-        except serial.SerialException as err:
-            print(f"Error opening serial port: {err}", file=sys.stderr)
+            for source in SOURCES:
+                self.stations.append(open_transport(source, BAUD_RATE))
+        except OSError as err:   # serial.SerialException is an OSError
+            print(f"Error opening base station source: {err}", file=sys.stderr)
+            for station in self.stations:
+                station.close()
             raise
               
         self.map = folium.Map(location=[37.227779, -80.422289], zoom_start=18)
@@ -48,7 +63,23 @@ class MapManager(QtCore.QObject):
         self.id_filter = None 
         self.time_filter = None
         self.time_filter_state = True # Flag for time filter to check before or after time
+        self.marker_cache = MarkerCache() # Prebuilt marker HTML reused across renders
+
+        # Keep recent history at full resolution, older history is downsampled into segment files
+        self.history_retention = HistoryRetention()
+        self.compact_history()
+
+        # Index of packets already stored, used to deduplicate packets heard by several stations
+        self.seen_packets = {}
+        self.index_history()
 
+        # Reader thread only frames bytes into the queue, processing thread drains it in batches
+        self.ingest_queue = IngestQueue(queue_size, drop_policy)
+        self.batch_size = batch_size
+        self.reported_drops = 0
+        self.station_reader = StationReader(self.stations, self.ingest_queue, PACKET_SIZE)
+
+        threading.Thread(target=self.read_stations, daemon=True).start()
         threading.Thread(target=self.exec, daemon=True).start()
 
     def load_json(self, json_file):
@@ -81,31 +112,97 @@ class MapManager(QtCore.QObject):
 
         return self.update_map()
 
+    def read_stations(self):
+        """ Reader loop that frames packets from every base station into the ingest queue """
+
+        self.station_reader.run()
+
+        # Every station has disconnected
+        print("All base stations disconnected", file=sys.stderr)
+        self.closeWindow.emit()
+
     def exec(self):
-        """ Main exec loop for the worker to read data from the serial port """
+        """ Main exec loop for the worker to process batches of packets from the ingest queue """
 
-        try:
-            while True:
-                if self.serial_port.in_waiting >= PACKET_SIZE:          # Anytime there is a packet to read
-                    data = self.serial_port.read(PACKET_SIZE + 2)       # + 2 takes in the "\r\n" which will be trimmed
-                    if len(data) == PACKET_SIZE + 2:
-                        data = data[2:]
-                    try:
-                        decodedData = self.decode(data)
-                        print("Checking if packet is valid...")
-                        if (self.isValidGPS(decodedData[3], decodedData[4]) and 0 < decodedData[0] < MAX_RADIO_ID): # Checks for various invalid packets
-                            if self.check_point(decodedData):           # Check if point is a duplicate
-                                self.add_or_update_beacon(decodedData)                 # Add or update Live file with point data
-
-                                if not self.paused: # If not paused, update the map
-                                    self.htmlChanged.emit(self.update_map())   
-                    except PacketLengthError as err:
-                        print(f"Error: {err}", file=sys.stderr)
-        except serial.SerialException as err:
-            print(f"Serial communication error: {err}", file=sys.stderr)
-            self.closeWindow.emit()
-        finally:
-            self.serial_port.close()
+        while True:
+            batch = self.ingest_queue.get_batch(self.batch_size, timeout=1)
+
+            # Periodically move old history into segment files
+            if time.monotonic() - self.last_compaction >= COMPACT_INTERVAL:
+                self.compact_history()
+
+            if not batch:
+                if self.ingest_queue.closed:
+                    break
+                continue
+
+            changed = False
+            for station, data in batch:
+                try:
+                    decodedData = self.decode(data)
+                    print("Checking if packet is valid...")
+                    if (self.isValidGPS(decodedData[3], decodedData[4]) and 0 < decodedData[0] < MAX_RADIO_ID): # Checks for various invalid packets
+                        # Packets older than the full resolution window may already be compacted out of
+                        # the duplicate index, and would replace the live marker with an old fix
+                        if self.history_retention.is_expired(decodedData[6]):
+                            print(f"Ignoring expired packet from Radio ID: {decodedData[0]} sent at {decodedData[6]} UTC")
+                            continue
+                        is_new, station_added = self.check_point(decodedData, station)  # Check if point is a duplicate
+                        if is_new:
+                            self.add_or_update_beacon(decodedData, station, save=False)    # Add or update Live data with point data
+                            changed = True
+                        elif station_added: # Duplicate heard by another station, save and show the new Heard By
+                            changed = True
+                except PacketLengthError as err:
+                    print(f"Error: {err}", file=sys.stderr)
+
+            self.report_queue_stats()
+
+            if changed:
+                # Write files and render once per batch instead of once per packet
+                self.save_json(self.history_file, self.history_data)
+                self.save_json(self.live_file, self.live_data)
+
+                if not self.paused: # If not paused, update the map
+                    self.htmlChanged.emit(self.update_map())
+
+    def compact_history(self):
+        """ Apply the retention policy to history and save the trimmed history file """
+        self.last_compaction = time.monotonic()
+
+        features = self.history_data["features"]
+        recent = self.history_retention.compact(features)
+        if len(recent) != len(features):
+            self.history_data["features"] = recent
+            self.save_json(self.history_file, self.history_data)
+            self.index_history()
+
+    def history_features(self):
+        """ Recent history plus any older segments the time filter reaches into """
+        features = self.history_data["features"]
+        if self.time_filter is None:
+            return features
+
+        filter_time = datetime.strptime(self.time_filter, "%m-%d-%Y %H:%M:%S").replace(tzinfo=UTC)
+        if self.time_filter_state:
+            segment_features = self.history_retention.load_range(start=filter_time)
+        else:
+            segment_features = self.history_retention.load_range(end=filter_time)
+        return segment_features + features
+
+    def report_queue_stats(self):
+        """ Print a warning whenever the ingest queue has dropped frames since the last report """
+
+        stats = self.ingest_queue.stats()
+        if stats["dropped"] > self.reported_drops:
+            print(f"Warning: ingest queue dropped {stats['dropped'] - self.reported_drops} frame(s) "
+                  f"(depth {stats['depth']}/{stats['capacity']}, max depth {stats['max_depth']}, "
+                  f"total dropped {stats['dropped']})", file=sys.stderr)
+            self.reported_drops = stats["dropped"]
+
+    def queue_stats(self):
+        """ Return the ingest queue depth and drop counters """
+        return self.ingest_queue.stats()
 
     def load_HTML(self):
         """ Loads the html from the map """
@@ -119,16 +216,17 @@ class MapManager(QtCore.QObject):
 
         # Create a new map
         self.map = folium.Map(location=[37.227779, -80.422289], zoom_start=18)
+        self.map.get_root().header.add_child(folium.Element(MARKER_CSS))
 
         # reset coordinate list
         self.latitudes = []
         self.longitudes = []
 
         # Data to display based on GUI state
-        display_data = self.history_data if self.show_history else self.live_data
+        display_features = self.history_features() if self.show_history else self.live_data["features"]
 
         # For loop to add each beacon data point to the map
-        for feature in display_data["features"]:
+        for feature in display_features:
             properties = feature["properties"]
             radio_id = properties["Radio ID"]
 
@@ -150,105 +248,38 @@ class MapManager(QtCore.QObject):
             coordinates = feature["geometry"]["coordinates"]
 
             # Extract remaning data line
-            message_id = properties["Message ID"]
-            panic_state = properties["Panic State"]
             latitude = properties["Latitude"]
             longitude = properties["Longitude"]
-            battery_life = properties["Battery Life"]
-            utc_time = properties["Time"]
 
             # Add coordinates to member variables
             self.latitudes.append(latitude)
             self.longitudes.append(longitude)
 
-            # Create the tooltip's HTML for hover event
-            tooltip_html = f"""
-            <div style="font-family: Arial; font-size: 20px; padding: 5px; width: 300px;">
-                <div>Radio ID: {radio_id}</div>
-                <div>Message ID: {message_id}</div>
-                <div>Panic State: {'YES' if panic_state else 'NO'}</div>
-                <div>Latitude: {latitude:.5f}</div>
-                <div>Longitude: {longitude:.5f}</div>
-            </div>
-            """
-            
-            # Create a tooltip that shows on hover
-            tooltip = folium.Tooltip(tooltip_html)
-
-            # Create popup's html for click event
-            popup_string = f"""
-            <div style="font-family: Arial; font-size: 26px; padding: 5px; width: 375px;">
-                <div>Radio ID: {radio_id}</div>
-                <div>Message ID: {message_id}</div>
-                <div>Panic State: {'YES' if panic_state else 'NO'}</div>
-                <div>Latitude: {latitude:.5f}</div>
-                <div>Longitude: {longitude:.5f}</div>
-                <div>Battery: {battery_life:.1f}%</div>
-                <div>Time: {utc_time} UTC</div>
-            """
-    
-            # Create a popup to contain the HTML string
-            iframe = folium.IFrame(html=popup_string)
-            popup = folium.Popup(iframe, min_width=450, max_width=400)
-
-            # set icon color of marker based on panic mode state
-            icon_color = 'red' if panic_state else 'blue'
-
             # In history view, use smaller markers with timestamp-based opacity
             if self.show_history:
                 # Create lines connecting points from the same radio ID
-                self.add_history_lines(radio_id)
+                self.add_history_lines(radio_id, display_features)
 
                 # Get the opacity from the feature properties
                 opacity = properties.get("opacity", 1.0)
-                
-                icon = folium.DivIcon(
-                    icon_size=(150, 36),
-                    icon_anchor=(21, 20),
-                    popup_anchor=(2, -15),
-                    html=f'''
-                        <div style="
-                            width: 45px;
-                            height: 45px;
-                            border-radius: 50%;
-                            background-color: {icon_color};
-                            opacity: {opacity};
-                            display: flex;
-                            justify-content: center;
-                            align-items: center;
-                            color: white;
-                            font-size: 20px;
-                            font-weight: bold;
-                            border: 1px solid white;
-                        ">
-                            {radio_id}
-                        </div>
-                    '''
-                )
+                icon_anchor, popup_anchor = (21, 20), (2, -15)
             else:
+                opacity = 1.0
+                icon_anchor, popup_anchor = (14, 40), (14, -35)
+
+            # Reuse the tooltip, popup and icon HTML if this beacon hasn't changed since the last render
+            tooltip_html, popup_html, icon_html = self.marker_cache.get(properties, self.show_history, opacity)
 
-                icon = folium.DivIcon(
-                    icon_size=(150, 36),
-                    icon_anchor=(14, 40),
-                    popup_anchor=(14, -35),
-                    html=f'''
-                        <div style="
-                            width: 60px;
-                            height: 60px;
-                            border-radius: 50%;
-                            background-color: {icon_color};
-                            display: flex;
-                            justify-content: center;
-                            align-items: center;
-                            color: white;
-                            font-size: 26px;
-                            font-weight: bold;
-                            border: 2px solid white;
-                        ">
-                            {radio_id}
-                        </div>
-                    '''
-                )
+            # Create a tooltip that shows on hover and a popup for click event
+            tooltip = folium.Tooltip(tooltip_html)
+            popup = folium.Popup(popup_html, min_width=450, max_width=400)
+
+            icon = folium.DivIcon(
+                icon_size=(150, 36),
+                icon_anchor=icon_anchor,
+                popup_anchor=popup_anchor,
+                html=icon_html
+            )
 
             # add custom marker to map
             folium.Marker(
@@ -267,7 +298,7 @@ class MapManager(QtCore.QObject):
 
         return self.load_HTML()
 
-    def add_or_update_beacon(self, packet):
+    def add_or_update_beacon(self, packet, station=None, save=True):
         """ Add a new beacon or update an existing to their respective JSON files based on radio_id """
 
         (radio_id, message_id, panic_state, latitude, longitude, 
@@ -292,7 +323,9 @@ class MapManager(QtCore.QObject):
                 "Latitude": latitude,
                 "Longitude": longitude,
                 "Battery Life": battery_life,
-                "Time": utc_time
+                "Time": utc_time,
+                "Station": station,
+                "Heard By": [station] if station is not None else []
             },
             "geometry": {
                 "type": "Point",
@@ -302,7 +335,9 @@ class MapManager(QtCore.QObject):
 
         # Add beacon to history data no matter whats
         self.history_data["features"].append(beacon_data)
-        self.save_json(self.history_file, self.history_data)
+        self.seen_packets[self.packet_key(packet)] = beacon_data
+        if save:
+            self.save_json(self.history_file, self.history_data)
         
         # Update existing beacon point or add a new point to live data 
         if beacon_index >= 0:
@@ -313,13 +348,14 @@ class MapManager(QtCore.QObject):
             print(f"Added new beacon with Radio ID: {radio_id}")
         
         # Save changes to file
-        self.save_json(self.live_file, self.live_data)
+        if save:
+            self.save_json(self.live_file, self.live_data)
 
-    def add_history_lines(self, radio_id):
+    def add_history_lines(self, radio_id, features):
         """ Add lines connecting markers for a specific radio ID together in history view """
 
         beacon_points = []
-        for feature in self.history_data["features"]:
+        for feature in features:
             if feature["properties"]["Radio ID"] == radio_id:
 
                 # Check if Time filter is set to ignore points outside of time range
@@ -375,31 +411,60 @@ class MapManager(QtCore.QObject):
         return self.update_map()
 
 
-    def check_point(self, packet):
-        """Checks packet data against internal database to see if it is a duplicate"""
-        (radio_id, message_id, panic_state, latitude, longitude, 
-         battery_life, utc_time) = packet
-        
+    def packet_key(self, packet):
+        """ Key that identifies one transmission of a beacon no matter which station heard it """
+        radio_id, message_id, utc_time = packet[0], packet[1], packet[6]
+        return (radio_id, message_id, utc_time)
+
+    def index_history(self):
+        """ Rebuild the duplicate index from the stored history """
+        self.seen_packets = {}
         for feature in self.history_data["features"]:
-            properties = feature["properties"]
-            
-            # Check if this feature has the same radio_id
-            if properties.get("Radio ID") == radio_id:                    
-                # Check if coordinates and other relevant data match
-                coords = feature["geometry"]["coordinates"]
-                if (properties.get("Message ID") == message_id and
-                    coords[0] == longitude and 
-                    coords[1] == latitude and 
-                    properties.get("Panic") == panic_state and
-                    properties.get("Battery") == battery_life and
-                    properties.get("UTCTime") == utc_time):
-                    print(f"Duplicate position data detected for Radio ID: {radio_id}")
-                    return False
-    
+            self.seen_packets[feature_key(feature)] = feature
+
+    def check_point(self, packet, station=None):
+        """Checks packet data against internal database to see if it is a duplicate.
+           Returns (is_new, station_added) where station_added means a duplicate was heard by a new station"""
+        radio_id = packet[0]
+
+        feature = self.seen_packets.get(self.packet_key(packet))
+        if feature is not None:
+            # Record every station that heard this packet
+            station_added = False
+            if station is not None:
+                for live_feature in self.live_data["features"]:
+                    if self.packet_key(packet) == (live_feature["properties"].get("Radio ID"),
+                                                   live_feature["properties"].get("Message ID"),
+                                                   live_feature["properties"].get("Time")):
+                        station_added |= self.add_heard_by(live_feature, station)
+                station_added |= self.add_heard_by(feature, station)
+                if station_added:
+                    print(f"Packet from Radio ID: {radio_id} also heard by station {station}")
+            print(f"Duplicate position data detected for Radio ID: {radio_id}")
+            return False, station_added
+
         # no duplicate was found
         print(f"No duplicate found for Radio ID: {radio_id}")
+        return True, False
+
+    def add_heard_by(self, feature, station):
+        """ Add a station to the list of stations that heard a feature, returns True if it was new """
+        heard_by = feature["properties"].setdefault("Heard By", [])
+        if station in heard_by:
+            return False
+        heard_by.append(station)
         return True
 
+    def clear_beacons(self):
+        """ Erase all live and history beacon data """
+        self.live_data["features"] = []
+        self.history_data["features"] = []
+        self.history_retention.clear()
+        self.marker_cache.clear()
+        self.seen_packets = {}
+        self.save_json(self.live_file, self.live_data)
+        self.save_json(self.history_file, self.history_data)
+
 
     def decode(self, received_data: bytes):
         """ Decodes the data packet from Arduino """
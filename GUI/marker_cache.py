@@ -0,0 +1,151 @@
+"""
+This file contains the cache of prebuilt marker HTML fragments. A beacon's
+tooltip, popup and icon only change when the beacon sends a new message, so
+fragments are built once per beacon state and reused on every map render.
+Styling shared by every marker lives in MARKER_CSS instead of being repeated
+inline for each one.
+"""
+
+from collections import OrderedDict
+import threading
+import folium
+
+MARKER_CACHE_SIZE = 4096    # Max beacon states kept, least recently rendered are evicted first
+
+# Added to the map header once per render. Popups render inside an iframe so they keep inline styles
+MARKER_CSS = """
+<style>
+    .beacon-marker {
+        border-radius: 50%;
+        display: flex;
+        justify-content: center;
+        align-items: center;
+        color: white;
+        font-weight: bold;
+    }
+    .beacon-live {
+        width: 60px;
+        height: 60px;
+        font-size: 26px;
+        border: 2px solid white;
+    }
+    .beacon-history {
+        width: 45px;
+        height: 45px;
+        font-size: 20px;
+        border: 1px solid white;
+    }
+    .beacon-normal {
+        background-color: blue;
+    }
+    .beacon-panic {
+        background-color: red;
+    }
+    .beacon-tooltip {
+        font-family: Arial;
+        font-size: 20px;
+        padding: 5px;
+        width: 300px;
+    }
+</style>
+"""
+
+def build_fragments(properties, show_history, opacity):
+    """ Build the (tooltip, popup, icon) HTML for one beacon """
+
+    radio_id = properties["Radio ID"]
+    message_id = properties["Message ID"]
+    panic_state = properties["Panic State"]
+    latitude = properties["Latitude"]
+    longitude = properties["Longitude"]
+    battery_life = properties["Battery Life"]
+    utc_time = properties["Time"]
+    heard_by = properties.get("Heard By", [])
+
+    # Create the tooltip's HTML for hover event
+    tooltip_html = f"""
+    <div class="beacon-tooltip">
+        <div>Radio ID: {radio_id}</div>
+        <div>Message ID: {message_id}</div>
+        <div>Panic State: {'YES' if panic_state else 'NO'}</div>
+        <div>Latitude: {latitude:.5f}</div>
+        <div>Longitude: {longitude:.5f}</div>
+    </div>
+    """
+
+    # Create popup's html for click event
+    popup_string = f"""
+    <div style="font-family: Arial; font-size: 26px; padding: 5px; width: 375px;">
+        <div>Radio ID: {radio_id}</div>
+        <div>Message ID: {message_id}</div>
+        <div>Panic State: {'YES' if panic_state else 'NO'}</div>
+        <div>Latitude: {latitude:.5f}</div>
+        <div>Longitude: {longitude:.5f}</div>
+        <div>Battery: {battery_life:.1f}%</div>
+        <div>Time: {utc_time} UTC</div>
+        <div>Heard By: {', '.join(heard_by) if heard_by else 'Unknown'}</div>
+    """
+
+    # Render the popup's iframe once, this base64 encodes the whole popup
+    popup_html = folium.IFrame(html=popup_string).render()
+
+    # set icon color of marker based on panic mode state
+    color_class = 'beacon-panic' if panic_state else 'beacon-normal'
+
+    # In history view, use smaller markers with timestamp-based opacity
+    if show_history:
+        icon_html = f'<div class="beacon-marker beacon-history {color_class}" style="opacity: {opacity};">{radio_id}</div>'
+    else:
+        icon_html = f'<div class="beacon-marker beacon-live {color_class}">{radio_id}</div>'
+
+    return tooltip_html, popup_html, icon_html
+
+class MarkerCache:
+    """ LRU cache of marker fragments keyed by beacon state """
+
+    def __init__(self, maxsize=MARKER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.fragments = OrderedDict()
+        self.lock = threading.Lock()    # Renders happen on both the GUI and processing threads
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, properties, show_history, opacity):
+        """ Radio ID, message ID and view state identify a marker. Time is included because
+            legacy message IDs wrap, and Heard By because it is shown in the popup """
+        return (properties["Radio ID"], properties["Message ID"], properties["Time"],
+                show_history, opacity, tuple(properties.get("Heard By", [])))
+
+    def get(self, properties, show_history, opacity=1.0):
+        """ Return the (tooltip, popup, icon) HTML for a beacon, building it on a miss """
+
+        key = self.key(properties, show_history, opacity)
+        with self.lock:
+            fragments = self.fragments.get(key)
+            if fragments is not None:
+                self.fragments.move_to_end(key)
+                self.hits += 1
+                return fragments
+
+        fragments = build_fragments(properties, show_history, opacity)
+
+        with self.lock:
+            self.misses += 1
+            self.fragments[key] = fragments
+            while len(self.fragments) > self.maxsize:
+                self.fragments.popitem(last=False)
+        return fragments
+
+    def clear(self):
+        with self.lock:
+            self.fragments.clear()
+
+    def stats(self):
+        """ Snapshot of the cache metrics """
+        with self.lock:
+            return {
+                "size": len(self.fragments),
+                "capacity": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses
+            }
@@ -0,0 +1,148 @@
+"""
+This file contains the ingest layer for reading several base stations at once.
+Every station's transport (serial, TCP or UDP) is watched by a single selector
+loop running on one thread, so adding a station costs a file descriptor instead
+of a thread. Frames are tagged with the name of the station they came from
+before being handed to the ingest queue.
+"""
+
+import selectors
+import sys
+import time
+
+STALE_FRAME_TIMEOUT = 1.0   # Seconds before a partial frame is flushed (matches the old serial timeout)
+POLL_INTERVAL = 0.05        # Seconds between polls of stations that can't be registered with the selector
+
+class FrameBuffer:
+    """ Splits the raw byte stream of one station into fixed size frames """
+
+    def __init__(self, frame_size, stale_timeout=STALE_FRAME_TIMEOUT):
+        self.frame_size = frame_size
+        self.stale_timeout = stale_timeout
+        self.buffer = bytearray()
+        self.last_data = 0.0
+
+    def feed(self, data, now=None):
+        """ Add received bytes and return every complete frame """
+        self.buffer += data
+        self.last_data = time.monotonic() if now is None else now
+
+        frames = []
+        while len(self.buffer) >= self.frame_size:
+            # The base station sends "\r\n" before each packet, wait for the whole packet before trimming it
+            if self.buffer[:2] == b"\r\n":
+                if len(self.buffer) < self.frame_size + 2:
+                    break
+                del self.buffer[:2]
+            frames.append(bytes(self.buffer[:self.frame_size]))
+            del self.buffer[:self.frame_size]
+        return frames
+
+    def flush_stale(self, now=None):
+        """ Return a partial frame that has waited too long so the stream can resync """
+        now = time.monotonic() if now is None else now
+        if self.buffer and now - self.last_data >= self.stale_timeout:
+            frame = bytes(self.buffer)
+            self.buffer.clear()
+            return [frame]
+        return []
+
+class StationReader:
+    """ Reads frames from many stations concurrently on a single thread """
+
+    def __init__(self, stations, ingest_queue, frame_size):
+        self.stations = []
+        self.ingest_queue = ingest_queue
+        self.frame_size = frame_size
+        self.framers = {}   # Keyed by (transport, station name) since one UDP socket carries many stations
+        self.selector = selectors.DefaultSelector()
+        self.polled = []    # Stations without a usable file descriptor (e.g. serial ports on Windows)
+        self.running = False
+
+        for station in stations:
+            self.add(station)
+
+    def add(self, station):
+        """ Watch a station with the selector, falling back to polling """
+        self.stations.append(station)
+        try:
+            fileno = station.fileno()
+            if fileno is None:
+                raise ValueError("no file descriptor")
+            self.selector.register(fileno, selectors.EVENT_READ, station)
+        except (ValueError, OSError):
+            self.polled.append(station)
+
+    def remove(self, station, err=None):
+        """ Stop reading from a station that has failed or disconnected """
+        if err is not None:
+            print(f"Station {station.name} communication error: {err}", file=sys.stderr)
+        if station in self.polled:
+            self.polled.remove(station)
+        else:
+            try:
+                self.selector.unregister(station.fileno())
+            except (KeyError, ValueError, OSError):
+                pass
+        self.stations.remove(station)
+        for key in [key for key in self.framers if key[0] is station]:
+            del self.framers[key]
+        try:
+            station.close()
+        except OSError:
+            pass
+
+    def framer(self, station, name):
+        """ Frame buffer for one station name arriving over a transport """
+        key = (station, name)
+        if key not in self.framers:
+            self.framers[key] = FrameBuffer(self.frame_size)
+        return self.framers[key]
+
+    def read_station(self, station):
+        """ Read from one station and queue any complete frames """
+        connection = station.accept()
+        if connection is not None:
+            self.add(connection)
+            return
+
+        try:
+            chunks = station.read()
+        except OSError as err:
+            self.remove(station, err)
+            return
+        for name, data in chunks:
+            for frame in self.framer(station, name).feed(data):
+                self.ingest_queue.put((name, frame))
+
+    def run(self):
+        """ Main loop, returns once every station has been removed or stop() is called """
+        self.running = True
+        try:
+            while self.running and self.stations:
+                timeout = POLL_INTERVAL if self.polled else STALE_FRAME_TIMEOUT
+
+                if self.selector.get_map():
+                    for key, _ in self.selector.select(timeout):
+                        self.read_station(key.data)
+                else:
+                    time.sleep(timeout)
+
+                for station in list(self.polled):
+                    self.read_station(station)
+
+                # Flush partial frames so a dropped byte doesn't misalign a station forever
+                now = time.monotonic()
+                for (station, name), framer in self.framers.items():
+                    if not station.resync:
+                        continue
+                    for frame in framer.flush_stale(now):
+                        self.ingest_queue.put((name, frame))
+        finally:
+            for station in list(self.stations):
+                self.remove(station)
+            self.selector.close()
+            self.ingest_queue.close()
+
+    def stop(self):
+        self.running = False
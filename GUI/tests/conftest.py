@@ -0,0 +1,5 @@
+import os
+import sys
+
+# GUI modules import each other by name, so make the GUI folder importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,5 @@
+import struct
+
+def make_packet(radio_id, message_id):
+    """ Build a mesh packet the way the beacons encode it """
+    return struct.pack("!BhffBI", 0x80 | radio_id, message_id, 37.2277, -80.4222, 90, 1700000000 + message_id)
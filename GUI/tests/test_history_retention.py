@@ -0,0 +1,146 @@
+import json
+import threading
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from history_retention import TIME_FORMAT, HistoryRetention
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=UTC)
+
+def make_feature(time, radio_id=1, message_id=None, panic=False):
+    if message_id is None:
+        message_id = int(time.timestamp()) % 0x7FFF
+    return {
+        "type": "Feature",
+        "properties": {
+            "Radio ID": radio_id,
+            "Message ID": message_id,
+            "Panic State": panic,
+            "Latitude": 37.2277,
+            "Longitude": -80.4222,
+            "Battery Life": 90,
+            "Time": time.strftime(TIME_FORMAT)
+        },
+        "geometry": {
+            "type": "Point",
+            "coordinates": [-80.4222, 37.2277]
+        }
+    }
+
+def times(features):
+    return [feature["properties"]["Time"] for feature in features]
+
+@pytest.fixture
+def retention(tmp_path):
+    return HistoryRetention(segment_dir=str(tmp_path / "segments"))
+
+def test_is_expired(retention):
+    assert not retention.is_expired((NOW - timedelta(hours=23)).strftime(TIME_FORMAT), NOW)
+    assert retention.is_expired((NOW - timedelta(days=3)).strftime(TIME_FORMAT), NOW)
+
+def test_downsample_one_fix_per_interval(retention):
+    start = datetime(2026, 10, 17, 11, 0, tzinfo=UTC)
+    features = [make_feature(start + timedelta(minutes=i)) for i in range(15)]
+    kept = retention.downsample(features)
+    assert times(kept) == times([features[0], features[5], features[10]])
+
+def test_downsample_keeps_panic_transitions(retention):
+    start = datetime(2026, 10, 17, 11, 0, tzinfo=UTC)
+    panic_minutes = {2, 3}
+    features = [make_feature(start + timedelta(minutes=i), panic=i in panic_minutes) for i in range(5)]
+    kept = retention.downsample(features)
+    # Bucket start, panic turned on at minute 2, panic turned off at minute 4
+    assert times(kept) == times([features[0], features[2], features[4]])
+
+def test_downsample_per_radio(retention):
+    start = datetime(2026, 10, 17, 11, 0, tzinfo=UTC)
+    features = [make_feature(start + timedelta(minutes=i), radio_id=radio_id)
+                for i in range(3) for radio_id in (1, 2)]
+    kept = retention.downsample(features)
+    assert sorted(feature["properties"]["Radio ID"] for feature in kept) == [1, 2]
+
+def test_compact_keeps_recent_fixes(retention):
+    recent = make_feature(NOW - timedelta(hours=1))
+    old = make_feature(NOW - timedelta(days=2))
+    assert retention.compact([recent, old], NOW) == [recent]
+    assert times(retention.load_range()) == times([old])
+
+def test_compact_twice_does_not_duplicate(retention):
+    start = NOW - timedelta(days=2)
+    features = [make_feature(start + timedelta(minutes=5 * i)) for i in range(3)]
+    retention.compact(features, NOW)
+    retention.compact(features, NOW)
+
+    _, path = retention.segments()[0]
+    with open(path) as f:
+        assert len(json.load(f)["features"]) == 3
+
+def test_compact_bucket_split_across_runs(retention):
+    start = datetime(2026, 10, 17, 11, 0, tzinfo=UTC)
+    first_run = [make_feature(start + timedelta(minutes=i)) for i in range(2)]
+    second_run = [make_feature(start + timedelta(minutes=i)) for i in range(2, 5)]
+    retention.compact(first_run, NOW)
+    retention.compact(second_run, NOW)
+    assert times(retention.load_range()) == times([first_run[0]])
+
+def test_load_range_boundaries(retention):
+    day = timedelta(days=1)
+    first_day = datetime(2026, 10, 15, tzinfo=UTC)
+    features = [make_feature(first_day + i * day + timedelta(hours=6)) for i in range(3)]
+    retention.compact(features, NOW)
+    assert len(retention.segments()) == 3
+
+    # A filter starting exactly at a segment's start includes it, but not the segment ending there
+    assert times(retention.load_range(start=first_day + day)) == times(features[1:])
+    # A filter ending exactly at a segment's start still includes that segment
+    assert times(retention.load_range(end=first_day + day)) == times(features[:2])
+    # Just inside the first segment
+    assert times(retention.load_range(end=first_day + day - timedelta(seconds=1))) == times(features[:1])
+    assert times(retention.load_range(start=first_day + 3 * day)) == []
+    assert times(retention.load_range()) == times(features)
+
+def test_load_range_only_keeps_needed_segments(retention):
+    day = timedelta(days=1)
+    first_day = datetime(2026, 10, 15, tzinfo=UTC)
+    retention.compact([make_feature(first_day + i * day) for i in range(3)], NOW)
+
+    retention.load_range()
+    assert len(retention.loaded_segments) == 3
+    retention.load_range(start=first_day + 2 * day)
+    assert len(retention.loaded_segments) == 1
+
+def test_load_range_sees_rewritten_segment(retention):
+    start = datetime(2026, 10, 17, 11, 0, tzinfo=UTC)
+    retention.compact([make_feature(start)], NOW)
+    assert len(retention.load_range()) == 1
+
+    retention.compact([make_feature(start + timedelta(hours=1))], NOW)
+    assert len(retention.load_range()) == 2
+
+def test_load_range_during_compaction(retention):
+    start = datetime(2026, 10, 17, 0, 0, tzinfo=UTC)
+    batches = [[make_feature(start + timedelta(minutes=10 * (10 * run + i))) for i in range(10)] for run in range(10)]
+    stop = threading.Event()
+
+    def load_forever():
+        while not stop.is_set():
+            retention.load_range()
+
+    loader = threading.Thread(target=load_forever)
+    loader.start()
+    try:
+        for batch in batches:
+            retention.compact(batch, NOW)
+    finally:
+        stop.set()
+        loader.join()
+
+    # Whatever the GUI thread cached while compaction ran, the next load has every fix
+    assert len(retention.load_range()) == 100
+
+def test_clear(retention):
+    retention.compact([make_feature(NOW - timedelta(days=2))], NOW)
+    retention.clear()
+    assert retention.segments() == []
+    assert retention.load_range() == []
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from ingest_queue import BLOCK, DROP_NEWEST, DROP_OLDEST, IngestQueue
+
+def test_fifo_batches():
+    queue = IngestQueue(10)
+    for frame in range(5):
+        assert queue.put(frame)
+    assert queue.get_batch(3) == [0, 1, 2]
+    assert queue.get_batch(3) == [3, 4]
+
+def test_drop_oldest():
+    queue = IngestQueue(3, DROP_OLDEST)
+    results = [queue.put(frame) for frame in range(5)]
+    assert results == [True, True, True, False, False]
+    assert queue.get_batch(10) == [2, 3, 4]
+    stats = queue.stats()
+    assert stats["dropped"] == 2
+    assert stats["enqueued"] == 5
+
+def test_drop_newest():
+    queue = IngestQueue(3, DROP_NEWEST)
+    results = [queue.put(frame) for frame in range(5)]
+    assert results == [True, True, True, False, False]
+    assert queue.get_batch(10) == [0, 1, 2]
+    stats = queue.stats()
+    assert stats["dropped"] == 2
+    assert stats["enqueued"] == 3
+
+def test_block_times_out_when_full():
+    queue = IngestQueue(1, BLOCK)
+    assert queue.put(0)
+    started = time.monotonic()
+    assert not queue.put(1, timeout=0.1)
+    assert time.monotonic() - started >= 0.1
+    assert queue.stats()["dropped"] == 1
+    assert queue.get_batch(10) == [0]
+
+def test_block_waits_for_room():
+    queue = IngestQueue(1, BLOCK)
+    queue.put(0)
+    result = []
+    producer = threading.Thread(target=lambda: result.append(queue.put(1, timeout=5)))
+    producer.start()
+    time.sleep(0.05)
+    assert producer.is_alive()
+
+    assert queue.get_batch(1) == [0]
+    producer.join(5)
+    assert result == [True]
+    assert queue.get_batch(1) == [1]
+    assert queue.stats()["dropped"] == 0
+
+def test_close_wakes_blocked_put():
+    queue = IngestQueue(1, BLOCK)
+    queue.put(0)
+    result = []
+    producer = threading.Thread(target=lambda: result.append(queue.put(1)))
+    producer.start()
+    time.sleep(0.05)
+    queue.close()
+    producer.join(5)
+    assert not producer.is_alive()
+    assert result == [False]
+
+def test_close_wakes_blocked_get():
+    queue = IngestQueue(1)
+    result = []
+    consumer = threading.Thread(target=lambda: result.append(queue.get_batch(10)))
+    consumer.start()
+    time.sleep(0.05)
+    queue.close()
+    consumer.join(5)
+    assert not consumer.is_alive()
+    assert result == [[]]
+
+def test_closed_queue_drains_then_rejects():
+    queue = IngestQueue(5)
+    queue.put(0)
+    queue.close()
+    assert not queue.put(1)
+    assert queue.get_batch(10) == [0]
+    assert queue.get_batch(10, timeout=0.01) == []
+
+def test_get_batch_timeout():
+    queue = IngestQueue(5)
+    started = time.monotonic()
+    assert queue.get_batch(10, timeout=0.1) == []
+    assert time.monotonic() - started >= 0.1
+
+def test_depth_and_max_depth():
+    queue = IngestQueue(10)
+    for frame in range(4):
+        queue.put(frame)
+    queue.get_batch(3)
+    queue.put(4)
+    assert queue.depth() == 2
+    stats = queue.stats()
+    assert stats["depth"] == 2
+    assert stats["max_depth"] == 4
+    assert stats["capacity"] == 10
+
+@pytest.mark.parametrize("maxsize, policy", [(0, DROP_OLDEST), (5, "drop_everything")])
+def test_invalid_configuration(maxsize, policy):
+    with pytest.raises(ValueError):
+        IngestQueue(maxsize, policy)
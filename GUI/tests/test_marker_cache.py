@@ -0,0 +1,85 @@
+from marker_cache import MarkerCache, build_fragments
+
+def make_properties(radio_id=1, message_id=1, panic=False, heard_by=("COM3",)):
+    return {
+        "Radio ID": radio_id,
+        "Message ID": message_id,
+        "Panic State": panic,
+        "Latitude": 37.2277,
+        "Longitude": -80.4222,
+        "Battery Life": 90,
+        "Time": "10-19-2026 12:00:00",
+        "Station": heard_by[0] if heard_by else None,
+        "Heard By": list(heard_by)
+    }
+
+def test_hit_for_same_beacon_state():
+    cache = MarkerCache()
+    first = cache.get(make_properties(), show_history=False)
+    second = cache.get(make_properties(), show_history=False)
+    assert second is first
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_miss_when_view_changes():
+    cache = MarkerCache()
+    cache.get(make_properties(), show_history=False)
+    cache.get(make_properties(), show_history=True)
+    assert cache.stats()["misses"] == 2
+
+def test_miss_when_opacity_changes():
+    cache = MarkerCache()
+    cache.get(make_properties(), show_history=True, opacity=1.0)
+    faded = cache.get(make_properties(), show_history=True, opacity=0.5)
+    assert cache.stats()["misses"] == 2
+    assert "opacity: 0.5" in faded[2]
+
+def test_miss_when_heard_by_changes():
+    cache = MarkerCache()
+    cache.get(make_properties(heard_by=("COM3",)), show_history=False)
+    cache.get(make_properties(heard_by=("COM3", "north")), show_history=False)
+    assert cache.stats()["misses"] == 2
+
+def test_miss_for_new_message():
+    cache = MarkerCache()
+    cache.get(make_properties(message_id=1), show_history=False)
+    cache.get(make_properties(message_id=2), show_history=False)
+    assert cache.stats()["misses"] == 2
+
+def test_lru_eviction():
+    cache = MarkerCache(maxsize=2)
+    cache.get(make_properties(radio_id=1), show_history=False)
+    cache.get(make_properties(radio_id=2), show_history=False)
+    # Touch radio 1 so radio 2 is the least recently used
+    cache.get(make_properties(radio_id=1), show_history=False)
+    cache.get(make_properties(radio_id=3), show_history=False)
+    assert cache.stats()["size"] == 2
+
+    cache.get(make_properties(radio_id=1), show_history=False)
+    assert cache.stats()["hits"] == 2
+    cache.get(make_properties(radio_id=2), show_history=False)
+    assert cache.stats()["misses"] == 4
+
+def test_clear():
+    cache = MarkerCache()
+    cache.get(make_properties(), show_history=False)
+    cache.clear()
+    assert cache.stats()["size"] == 0
+
+def test_build_fragments_panic_class():
+    _, _, panic_icon = build_fragments(make_properties(panic=True), show_history=False, opacity=1.0)
+    _, _, normal_icon = build_fragments(make_properties(panic=False), show_history=False, opacity=1.0)
+    assert "beacon-panic" in panic_icon and "beacon-normal" not in panic_icon
+    assert "beacon-normal" in normal_icon and "beacon-panic" not in normal_icon
+
+def test_build_fragments_view_class():
+    _, _, live_icon = build_fragments(make_properties(), show_history=False, opacity=1.0)
+    _, _, history_icon = build_fragments(make_properties(), show_history=True, opacity=0.5)
+    assert "beacon-live" in live_icon and "opacity" not in live_icon
+    assert "beacon-history" in history_icon and "opacity: 0.5" in history_icon
+
+def test_build_fragments_popup_is_iframe():
+    tooltip, popup, _ = build_fragments(make_properties(), show_history=False, opacity=1.0)
+    assert 'class="beacon-tooltip"' in tooltip
+    assert popup.startswith("<div") or popup.startswith("<iframe")
+    assert "data:text/html;charset=utf-8;base64," in popup
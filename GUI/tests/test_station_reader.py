@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from helpers import make_packet
+from station_reader import FrameBuffer
+from transports import PACKET_SIZE
+
+PACKETS = [make_packet(radio_id, message_id) for radio_id in range(1, 4) for message_id in range(5)]
+STREAM = b"".join(b"\r\n" + packet for packet in PACKETS)
+
+def test_feed_whole_frames():
+    framer = FrameBuffer(PACKET_SIZE)
+    assert framer.feed(STREAM) == PACKETS
+    assert framer.buffer == b""
+
+def test_feed_one_byte_at_a_time():
+    framer = FrameBuffer(PACKET_SIZE)
+    frames = []
+    for i in range(len(STREAM)):
+        frames += framer.feed(STREAM[i:i + 1])
+    assert frames == PACKETS
+    assert framer.buffer == b""
+
+@pytest.mark.parametrize("seed", range(20))
+def test_feed_random_chunks(seed):
+    rng = random.Random(seed)
+    framer = FrameBuffer(PACKET_SIZE)
+    frames = []
+    i = 0
+    while i < len(STREAM):
+        size = rng.randint(1, 2 * PACKET_SIZE + 4)
+        frames += framer.feed(STREAM[i:i + size])
+        i += size
+    assert frames == PACKETS
+
+def test_feed_without_line_endings():
+    framer = FrameBuffer(PACKET_SIZE)
+    frames = []
+    for packet in PACKETS:
+        frames += framer.feed(packet[:7])
+        frames += framer.feed(packet[7:])
+    assert frames == PACKETS
+
+def test_flush_stale_partial_frame():
+    framer = FrameBuffer(PACKET_SIZE, stale_timeout=1.0)
+    assert framer.feed(b"\r\n" + PACKETS[0][:5], now=10.0) == []
+    assert framer.flush_stale(now=10.5) == []
+    assert framer.flush_stale(now=11.0) == [b"\r\n" + PACKETS[0][:5]]
+
+    # Stream resyncs on the next packet
+    assert framer.feed(b"\r\n" + PACKETS[1], now=12.0) == [PACKETS[1]]
@@ -0,0 +1,251 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from helpers import make_packet
+import forwarder
+import transports
+from forwarder import Forwarder, TCPSink, UDPSink
+from ingest_queue import IngestQueue
+from station_reader import STALE_FRAME_TIMEOUT, StationReader
+from transports import (PACKET_SIZE, DEFAULT_NETWORK_PORT, SerialTransport, TCPListenerTransport,
+                        Transport, UDPTransport, open_transport, parse_address, split_header,
+                        station_header)
+
+def free_port(kind=socket.SOCK_STREAM):
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def collect(ingest_queue, count, timeout=5):
+    """ Wait for count frames from the queue """
+    frames = []
+    deadline = time.monotonic() + timeout
+    while len(frames) < count and time.monotonic() < deadline:
+        frames += ingest_queue.get_batch(count - len(frames), timeout=0.1)
+    return frames
+
+def start_reader(stations):
+    ingest_queue = IngestQueue(1024)
+    reader = StationReader(stations, ingest_queue, PACKET_SIZE)
+    thread = threading.Thread(target=reader.run, daemon=True)
+    thread.start()
+    return reader, ingest_queue, thread
+
+class FakeSerialStation(Transport):
+    """ Stand-in for a base station on a serial port, the test writes to the other end of a socket pair """
+
+    def __init__(self, name="COM_TEST"):
+        self.name = name
+        self.port, self.device = socket.socketpair()
+        self.port.setblocking(False)
+
+    def fileno(self):
+        return self.port.fileno()
+
+    def read(self):
+        try:
+            data = self.port.recv(4096)
+        except BlockingIOError:
+            return []
+        if not data:
+            raise ConnectionError("base station unplugged")
+        return [(self.name, data)]
+
+    def close(self):
+        self.port.close()
+
+@pytest.mark.parametrize("address, expected", [
+    ("192.168.1.10:5001", ("192.168.1.10", 5001)),
+    (":5001", ("0.0.0.0", 5001)),
+    ("5001", ("0.0.0.0", 5001)),
+    ("", ("0.0.0.0", DEFAULT_NETWORK_PORT)),
+])
+def test_parse_address(address, expected):
+    assert parse_address(address) == expected
+
+def test_parse_address_default_host():
+    assert parse_address(":7000", default_host="localhost") == ("localhost", 7000)
+
+def test_open_transport_network():
+    tcp = open_transport(f"tcp://127.0.0.1:{free_port()}")
+    udp = open_transport(f"udp://127.0.0.1:{free_port(socket.SOCK_DGRAM)}")
+    try:
+        assert isinstance(tcp, TCPListenerTransport)
+        assert isinstance(udp, UDPTransport)
+    finally:
+        tcp.close()
+        udp.close()
+
+def test_open_transport_serial(monkeypatch):
+    opened = []
+    monkeypatch.setattr(transports.serial, "Serial", lambda *args, **kwargs: opened.append((args, kwargs)))
+    transport = open_transport("COM3", 19200)
+    assert isinstance(transport, SerialTransport)
+    assert transport.name == "COM3"
+    assert opened == [(("COM3", 19200), {"timeout": 0})]
+
+def test_split_header():
+    assert split_header(station_header("north") + b"frames") == ("north", b"frames")
+    assert split_header(make_packet(1, 1)) == (None, make_packet(1, 1))
+    with pytest.raises(ValueError):
+        split_header(b"PL")
+    with pytest.raises(ValueError):
+        split_header(b"PLB nor")
+
+def test_transport_is_abstract():
+    with pytest.raises(TypeError):
+        Transport()
+
+def test_tcp_listener_reads_several_forwarders():
+    port = free_port()
+    reader, ingest_queue, thread = start_reader([TCPListenerTransport("127.0.0.1", port)])
+    first = socket.create_connection(("127.0.0.1", port))
+    second = socket.create_connection(("127.0.0.1", port))
+    try:
+        # Split packets across writes so frames straddle reads
+        first.sendall(b"\r\n" + make_packet(1, 1)[:9])
+        second.sendall(b"\r\n" + make_packet(2, 1))
+        time.sleep(0.05)
+        first.sendall(make_packet(1, 1)[9:] + b"\r\n" + make_packet(1, 2))
+
+        frames = collect(ingest_queue, 3)
+        names = {name for name, _ in frames}
+        assert sorted(frame for _, frame in frames) == sorted([make_packet(1, 1), make_packet(1, 2), make_packet(2, 1)])
+        # Two forwarders on the same host are separate stations
+        assert names == {f"tcp:127.0.0.1:{first.getsockname()[1]}", f"tcp:127.0.0.1:{second.getsockname()[1]}"}
+    finally:
+        first.close()
+        second.close()
+        reader.stop()
+        thread.join(5)
+
+def test_tcp_frame_split_across_slow_segments_is_not_flushed():
+    port = free_port()
+    reader, ingest_queue, thread = start_reader([TCPListenerTransport("127.0.0.1", port)])
+    client = socket.create_connection(("127.0.0.1", port))
+    try:
+        client.sendall(b"\r\n" + make_packet(1, 1)[:6])
+        # Longer than the stale frame timeout, a serial framer would flush the partial frame here
+        time.sleep(STALE_FRAME_TIMEOUT + 0.3)
+        client.sendall(make_packet(1, 1)[6:] + b"\r\n" + make_packet(1, 2))
+        assert [frame for _, frame in collect(ingest_queue, 2)] == [make_packet(1, 1), make_packet(1, 2)]
+    finally:
+        client.close()
+        reader.stop()
+        thread.join(5)
+
+def test_tcp_handshake_names_station():
+    port = free_port()
+    reader, ingest_queue, thread = start_reader([TCPListenerTransport("127.0.0.1", port)])
+    clients = []
+    try:
+        # Same station connects twice, with the header and first frame split across writes
+        for message_id in (1, 2):
+            client = socket.create_connection(("127.0.0.1", port))
+            clients.append(client)
+            data = station_header("north") + b"\r\n" + make_packet(1, message_id)
+            client.sendall(data[:3])
+            time.sleep(0.05)
+            client.sendall(data[3:])
+            assert collect(ingest_queue, 1) == [("north", make_packet(1, message_id))]
+            client.close()
+    finally:
+        for client in clients:
+            client.close()
+        reader.stop()
+        thread.join(5)
+
+def test_udp_header_names_station():
+    port = free_port(socket.SOCK_DGRAM)
+    reader, ingest_queue, thread = start_reader([UDPTransport("127.0.0.1", port)])
+    try:
+        # A restarted forwarder sends from a new source port but keeps its name
+        for message_id in (1, 2):
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+                sender.sendto(station_header("south") + make_packet(2, message_id), ("127.0.0.1", port))
+                assert collect(ingest_queue, 1) == [("south", make_packet(2, message_id))]
+    finally:
+        reader.stop()
+        thread.join(5)
+
+def test_udp_transport_reads_datagrams():
+    port = free_port(socket.SOCK_DGRAM)
+    reader, ingest_queue, thread = start_reader([UDPTransport("127.0.0.1", port)])
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sender.sendto(make_packet(3, 1) + make_packet(3, 2), ("127.0.0.1", port))
+        frames = collect(ingest_queue, 2)
+        assert frames == [(f"udp:127.0.0.1:{sender.getsockname()[1]}", make_packet(3, 1)),
+                          (f"udp:127.0.0.1:{sender.getsockname()[1]}", make_packet(3, 2))]
+    finally:
+        sender.close()
+        reader.stop()
+        thread.join(5)
+
+def test_forwarder_reconnects_after_listener_restart(monkeypatch):
+    monkeypatch.setattr(forwarder, "MIN_RETRY_DELAY", 0.05)
+    monkeypatch.setattr(forwarder, "MAX_RETRY_DELAY", 0.2)
+
+    port = free_port()
+    reader, ingest_queue, thread = start_reader([TCPListenerTransport("127.0.0.1", port)])
+
+    station = FakeSerialStation()
+    relay = Forwarder(station, TCPSink("127.0.0.1", port, "ridge-station"), linger=0.01)
+    relay_thread = threading.Thread(target=relay.run, daemon=True)
+    relay_thread.start()
+
+    try:
+        station.device.sendall(b"\r\n" + make_packet(1, 1))
+        assert collect(ingest_queue, 1) == [("ridge-station", make_packet(1, 1))]
+
+        # GUI goes away, frames sent meanwhile may be lost in the dead connection
+        reader.stop()
+        thread.join(5)
+        station.device.sendall(b"\r\n" + make_packet(1, 2))
+        time.sleep(0.2)
+
+        # GUI comes back on the same port, the forwarder reconnects on its own
+        reader, ingest_queue, thread = start_reader([TCPListenerTransport("127.0.0.1", port)])
+        received = []
+        deadline = time.monotonic() + 10
+        message_id = 3
+        while make_packet(1, message_id - 1) not in [frame for _, frame in received] and time.monotonic() < deadline:
+            station.device.sendall(b"\r\n" + make_packet(1, message_id))
+            message_id += 1
+            received += collect(ingest_queue, 1, timeout=0.3)
+        assert received
+        assert all(len(frame) == PACKET_SIZE for _, frame in received)
+        assert received[-1][1] == make_packet(1, message_id - 1)
+        # The reconnected forwarder is still the same station
+        assert {name for name, _ in received} == {"ridge-station"}
+    finally:
+        station.device.close()
+        relay_thread.join(5)
+        reader.stop()
+        thread.join(5)
+
+def test_forwarder_drops_partial_frames():
+    port = free_port(socket.SOCK_DGRAM)
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", port))
+    receiver.settimeout(5)
+
+    station = FakeSerialStation()
+    relay = Forwarder(station, UDPSink("127.0.0.1", port, "ridge-station"), linger=0.01)
+    # A stale flush from the framer followed by a whole packet
+    relay.ingest_queue.put((station.name, make_packet(1, 1)[:5]))
+    relay.ingest_queue.put((station.name, make_packet(1, 2)))
+    relay_thread = threading.Thread(target=relay.run, daemon=True)
+    relay_thread.start()
+
+    try:
+        data, _ = receiver.recvfrom(65507)
+        assert data == station_header("ridge-station") + make_packet(1, 2)
+        assert relay.short_frames == 1
+    finally:
+        station.device.close()
+        relay_thread.join(5)
+        receiver.close()
@@ -0,0 +1,189 @@
+"""
+This file contains the transports that base station frames can arrive over.
+A base station plugged into this machine is read over serial, while remote base
+stations relay the same 16-byte frames over TCP or UDP using forwarder.py. Forwarders
+identify their station with a "PLB <name>" line, sent once when a TCP
+connection opens and in front of every UDP datagram, so a station keeps its
+name across reconnects. Every transport is non-blocking and exposes a file descriptor so they can all
+be watched by the single StationReader loop.
+"""
+
+from abc import ABC, abstractmethod
+import socket
+import sys
+import serial
+
+BAUD_RATE = 9600
+PACKET_SIZE = 16
+
+DEFAULT_NETWORK_PORT = 5000
+MAX_DATAGRAM_SIZE = 65507
+
+STATION_HEADER = b"PLB "   # "P" never starts a packet: mesh IDs set the MSB and legacy IDs fit in the low byte
+MAX_HEADER_SIZE = 256
+
+def station_header(name):
+    """ Header line naming the station that frames come from """
+    return STATION_HEADER + name.encode() + b"\n"
+
+def split_header(data):
+    """ Split a station header from the start of data. Returns (name, rest), with a name of None
+        if data has no header, or raises ValueError if the header is incomplete """
+    if not data.startswith(STATION_HEADER):
+        if STATION_HEADER.startswith(data):
+            raise ValueError("incomplete station header")
+        return None, data
+    end = data.find(b"\n")
+    if end < 0:
+        raise ValueError("incomplete station header")
+    return data[len(STATION_HEADER):end].decode(errors="replace").strip() or None, data[end + 1:]
+
+class Transport(ABC):
+    """ Base class for a source of base station frames """
+
+    name = None
+    resync = True   # Flush stale partial frames, for links that can drop bytes
+
+    @abstractmethod
+    def fileno(self):
+        """ File descriptor for the selector, or None if the platform doesn't provide one """
+
+    @abstractmethod
+    def read(self):
+        """ Read whatever bytes are currently available as a list of (station name, bytes) """
+
+    @abstractmethod
+    def close(self):
+        """ Release the underlying port or socket """
+
+    def accept(self):
+        """ New transport for a connection waiting on a listening transport, or None """
+        return None
+
+class SerialTransport(Transport):
+    """ A base station connected through a local serial port """
+
+    def __init__(self, port, baud_rate=BAUD_RATE):
+        self.name = port
+        self.serial_port = serial.Serial(port, baud_rate, timeout=0)   # Non-blocking, the selector does the waiting
+
+    def fileno(self):
+        fileno = getattr(self.serial_port, "fileno", None)
+        return fileno() if fileno is not None else None
+
+    def read(self):
+        waiting = self.serial_port.in_waiting
+        return [(self.name, self.serial_port.read(waiting))] if waiting else []
+
+    def close(self):
+        self.serial_port.close()
+
+class TCPTransport(Transport):
+    """ One connection from a remote forwarder, frames arrive as a byte stream """
+
+    resync = False  # TCP never loses bytes and forwarders only send whole frames
+
+    def __init__(self, connection, address):
+        # Named by address until the forwarder's header line says which station it is
+        self.name = f"tcp:{address[0]}:{address[1]}"
+        self.identified = False
+        self.header = b""
+        self.connection = connection
+        self.connection.setblocking(False)
+
+    def fileno(self):
+        return self.connection.fileno()
+
+    def read(self):
+        try:
+            data = self.connection.recv(4096)
+        except BlockingIOError:
+            return []
+        if not data:
+            raise ConnectionError("connection closed by forwarder")
+
+        if not self.identified:
+            self.header += data
+            try:
+                name, data = split_header(self.header)
+            except ValueError:
+                if len(self.header) > MAX_HEADER_SIZE:
+                    raise ConnectionError("station header too long")
+                return []
+            self.identified = True
+            self.header = b""
+            if name is not None:
+                print(f"Remote base station {self.name} identified as {name}")
+                self.name = name
+            if not data:
+                return []
+        return [(self.name, data)]
+
+    def close(self):
+        self.connection.close()
+
+class TCPListenerTransport(Transport):
+    """ Listening socket that accepts connections from remote forwarders """
+
+    def __init__(self, host, port):
+        self.name = f"tcp://{host}:{port}"
+        self.server = socket.create_server((host, port))
+        self.server.setblocking(False)
+
+    def fileno(self):
+        return self.server.fileno()
+
+    def accept(self):
+        """ Accept a waiting forwarder, returns its transport or None if nothing is waiting """
+        try:
+            connection, address = self.server.accept()
+        except BlockingIOError:
+            return None
+        print(f"Remote base station connected from {address[0]}:{address[1]}")
+        return TCPTransport(connection, address)
+
+    def read(self):
+        return []   # Connections are read through the transports returned by accept()
+
+    def close(self):
+        self.server.close()
+
+class UDPTransport(Transport):
+    """ UDP socket receiving datagrams of whole frames from any number of forwarders """
+
+    def __init__(self, host, port):
+        self.name = f"udp://{host}:{port}"
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def read(self):
+        try:
+            data, address = self.sock.recvfrom(MAX_DATAGRAM_SIZE)
+        except BlockingIOError:
+            return []
+        try:
+            name, data = split_header(data)
+        except ValueError:
+            print(f"Dropping datagram with a malformed station header from {address[0]}", file=sys.stderr)
+            return []
+        return [(name or f"udp:{address[0]}:{address[1]}", data)]
+
+    def close(self):
+        self.sock.close()
+
+def parse_address(address, default_host="0.0.0.0"):
+    """ Split "host:port" (either part optional) into a (host, port) tuple """
+    host, _, port = address.rpartition(":")
+    return (host or default_host, int(port) if port else DEFAULT_NETWORK_PORT)
+
+def open_transport(source, baud_rate=BAUD_RATE):
+    """ Open a transport from a source string: "tcp://host:port", "udp://host:port" or a serial port name """
+    if source.startswith("tcp://"):
+        return TCPListenerTransport(*parse_address(source[len("tcp://"):]))
+    if source.startswith("udp://"):
+        return UDPTransport(*parse_address(source[len("udp://"):]))
+    return SerialTransport(source, baud_rate)